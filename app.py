@@ -2,14 +2,16 @@
 
 import io
 import json
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import gspread
 from google.oauth2.service_account import Credentials
 
-from categories import categorize_transaction, get_category_list
+from categories import categorize_series, get_category_list
 
 # Google Sheets scope
 GSHEET_SCOPES = [
@@ -28,17 +30,17 @@ st.title("Finance Tracker Dashboard")
 st.markdown("Upload your bank statements to analyze your expenses")
 
 
-def load_xlsx(uploaded_file) -> pd.DataFrame:
-    """Load xlsx file and normalize columns."""
-    df = pd.read_excel(uploaded_file)
+@st.cache_data(show_spinner=False)
+def load_xlsx(file_name: str, file_bytes: bytes) -> pd.DataFrame:
+    """Load xlsx file contents and normalize columns."""
+    df = pd.read_excel(io.BytesIO(file_bytes), engine="calamine")
 
     # Ensure required columns exist
     required_columns = ["Transaction Date", "Details", "Amount"]
     missing = [col for col in required_columns if col not in df.columns]
     if missing:
-        st.error(
-            f"Missing required columns in {uploaded_file.name}: {missing}")
-        return None
+        raise ValueError(
+            f"Missing required columns in {file_name}: {missing}")
 
     # Normalize to standard columns
     df = df.rename(columns={
@@ -51,10 +53,17 @@ def load_xlsx(uploaded_file) -> pd.DataFrame:
     return df
 
 
-def load_csv(uploaded_file) -> pd.DataFrame:
-    """Load CSV file (with metadata header lines to skip) and normalize columns."""
-    # Read CSV, skipping the metadata header lines (5 lines before column headers)
-    df = pd.read_csv(uploaded_file, skiprows=5)
+@st.cache_data(show_spinner=False)
+def load_csv(file_name: str, file_bytes: bytes) -> pd.DataFrame:
+    """Load CSV file contents (with metadata header lines to skip) and normalize columns."""
+    # Read CSV, skipping the metadata header lines (5 lines before column headers).
+    # The pyarrow engine ignores skiprows, so the header row is given directly.
+    try:
+        df = pd.read_csv(io.BytesIO(file_bytes), header=5, engine="pyarrow")
+    except pd.errors.ParserError:
+        # pyarrow rejects rows with a different field count; the default
+        # engine loads them and fills the missing fields with NaN
+        df = pd.read_csv(io.BytesIO(file_bytes), skiprows=5)
     # Remove any blank rows
     df = df.dropna(how='all')
 
@@ -62,9 +71,8 @@ def load_csv(uploaded_file) -> pd.DataFrame:
     required_columns = ["Date", "Payee", "Amount"]
     missing = [col for col in required_columns if col not in df.columns]
     if missing:
-        st.error(
-            f"Missing required columns in {uploaded_file.name}: {missing}")
-        return None
+        raise ValueError(
+            f"Missing required columns in {file_name}: {missing}")
 
     # Normalize to standard columns
     df = df.rename(columns={
@@ -75,6 +83,28 @@ def load_csv(uploaded_file) -> pd.DataFrame:
     return df
 
 
+def to_month_codes(dates: pd.Series) -> np.ndarray:
+    """Convert dates to sortable int64 month codes (months since Jan 1970)."""
+    return pd.to_datetime(dates, errors="coerce").to_numpy().astype(
+        "datetime64[M]").view("int64")
+
+
+@st.cache_data(show_spinner=False)
+def _format_months(months: np.ndarray, fmt: str) -> np.ndarray:
+    """Format distinct int64 month codes with strftime."""
+    # Missing dates (the NaT code) are labelled "NaT" rather than left as NaN
+    return pd.DatetimeIndex(months.view("datetime64[M]")).strftime(
+        fmt).fillna("NaT").to_numpy(dtype=object)
+
+
+def month_labels(month_codes, fmt: str = "%b %Y") -> np.ndarray:
+    """Format int64 month codes as readable labels."""
+    # Only a few dozen distinct months: format (and cache) those, then expand
+    codes, months = pd.factorize(np.asarray(month_codes, dtype="int64"))
+    return _format_months(months, fmt)[codes]
+
+
+@st.cache_data(show_spinner=False)
 def process_data(df: pd.DataFrame) -> pd.DataFrame:
     """Process and categorize transaction data."""
     # Drop internal transfers (TFR IN / TFR OUT)
@@ -84,43 +114,66 @@ def process_data(df: pd.DataFrame) -> pd.DataFrame:
     # Convert Date to datetime
     df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
 
-    # Add Month column for grouping
-    df["Month"] = df["Date"].dt.to_period("M").astype(str)
+    # Add Month column for grouping, as sortable int64 codes; labels are only
+    # formatted where they are displayed
+    df["Month"] = to_month_codes(df["Date"])
 
     # Auto-categorize transactions
-    df["Category"] = df.apply(
-        lambda row: categorize_transaction(
-            str(row.get("Description", "")),
-            str(row.get("Memo", "")),
-            str(row.get("Tran Type", ""))
-        ),
-        axis=1
+    empty = pd.Series("", index=df.index)
+    df["Category"] = categorize_series(
+        df.get("Description", empty),
+        df.get("Memo", empty),
+        df.get("Tran Type", empty)
     )
 
-    # Add Expense/Income classification
-    df["Type Classification"] = df["Amount"].apply(
-        lambda x: "Income" if x > 0 else "Expense"
+    # Add Expense/Income classification (built straight from codes: 0 = Expense, 1 = Income)
+    df["Type Classification"] = pd.Categorical.from_codes(
+        (df["Amount"].to_numpy() > 0).astype(np.int8),
+        categories=["Expense", "Income"]
     )
 
+    # Store low-cardinality text columns as categoricals so groupbys run on
+    # integer codes instead of hashing strings (Category already is one)
+    for col in ["Tran Type", "Source"]:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
     return df
 
 
-def load_and_process_files(uploaded_files) -> pd.DataFrame:
-    """Load multiple files and combine into single DataFrame."""
+def _load_one(file_name: str, file_bytes: bytes) -> pd.DataFrame:
+    """Load a single file with the loader matching its extension."""
+    if file_name.endswith('.xlsx'):
+        return load_xlsx(file_name, file_bytes)
+    if file_name.endswith('.csv'):
+        return load_csv(file_name, file_bytes)
+    return None
+
+
+@st.cache_data(show_spinner=False)
+def load_and_process_files(files: tuple) -> pd.DataFrame:
+    """Load multiple (file name, file bytes) pairs and combine into single DataFrame."""
     all_dfs = []
 
-    for uploaded_file in uploaded_files:
-        if uploaded_file.name.endswith('.xlsx'):
-            df = load_xlsx(uploaded_file)
-        elif uploaded_file.name.endswith('.csv'):
-            df = load_csv(uploaded_file)
-        else:
-            st.warning(f"Unsupported file type: {uploaded_file.name}")
+    # Parse files in parallel; pandas releases the GIL for most of the parsing.
+    # Worker threads have no Streamlit context, so messages are shown from here.
+    with ThreadPoolExecutor(max_workers=min(8, len(files))) as executor:
+        futures = [executor.submit(_load_one, file_name, file_bytes)
+                   for file_name, file_bytes in files]
+
+    for (file_name, _), future in zip(files, futures):
+        try:
+            df = future.result()
+        except ValueError as e:
+            st.error(str(e))
+            continue
+
+        if df is None:
+            st.warning(f"Unsupported file type: {file_name}")
             continue
 
-        if df is not None:
-            df["Source"] = uploaded_file.name
-            all_dfs.append(df)
+        df["Source"] = file_name
+        all_dfs.append(df)
 
     if not all_dfs:
         return None
@@ -132,21 +185,50 @@ def load_and_process_files(uploaded_files) -> pd.DataFrame:
     return process_data(combined_df)
 
 
-def display_summary_metrics(df: pd.DataFrame):
+@st.cache_data(show_spinner=False)
+def summarize_expenses(df: pd.DataFrame) -> dict:
+    """Compute the expense rows and totals shared by the metrics, charts and export."""
+    amounts = df["Amount"].to_numpy(dtype="float64")
+    expense_mask = amounts < 0
+
+    # Expense rows with Amount as a positive value
+    expenses_df = df.loc[expense_mask].assign(Amount=-amounts[expense_mask])
+
+    # Keep rows without a category so they still count towards the monthly totals
+    table = expenses_df.groupby(
+        ["Month", "Category"], observed=True, dropna=False
+    )["Amount"].sum().unstack(fill_value=0)
+
+    monthly_totals = table.sum(axis=1).rename_axis(
+        "Month").reset_index(name="Amount")
+    category_totals = table.sum(axis=0)
+    category_totals = category_totals[category_totals.index.notna()].rename_axis(
+        "Category").reset_index(name="Amount")
+
+    return {
+        "expenses": expenses_df,
+        "total_expenses": expenses_df["Amount"].sum(),
+        "total_income": amounts[amounts > 0].sum(),
+        "monthly_totals": monthly_totals,
+        "category_totals": category_totals,
+    }
+
+
+def display_summary_metrics(df: pd.DataFrame, summary: dict):
     """Display summary metrics at the top of the dashboard."""
-    expenses_df = df[df["Amount"] < 0].copy()
-    income_df = df[df["Amount"] > 0].copy()
+    expenses_df = summary["expenses"]
+    category_totals = summary["category_totals"]
 
-    total_expenses = abs(expenses_df["Amount"].sum())
-    total_income = income_df["Amount"].sum()
+    total_expenses = summary["total_expenses"]
+    total_income = summary["total_income"]
     num_months = df["Month"].nunique()
     avg_monthly = total_expenses / num_months if num_months > 0 else 0
 
     # Find top expense category
     if not expenses_df.empty:
-        category_totals = expenses_df.groupby("Category")["Amount"].sum().abs()
-        top_category = category_totals.idxmax()
-        top_category_amount = category_totals.max()
+        top = category_totals.loc[category_totals["Amount"].idxmax()]
+        top_category = top["Category"]
+        top_category_amount = top["Amount"]
     else:
         top_category = "N/A"
         top_category_amount = 0
@@ -164,18 +246,13 @@ def display_summary_metrics(df: pd.DataFrame):
                   f"${top_category_amount:,.2f}")
 
 
-def display_monthly_chart(df: pd.DataFrame):
+def display_monthly_chart(summary: dict):
     """Display monthly expenses bar chart."""
-    expenses_df = df[df["Amount"] < 0].copy()
-    expenses_df["Amount"] = expenses_df["Amount"].abs()
+    monthly_totals = summary["monthly_totals"]
 
-    monthly_expenses = expenses_df.groupby(
-        "Month")["Amount"].sum().reset_index()
-    # Sort chronologically by converting to datetime, then format as readable month
-    monthly_expenses["Month_dt"] = pd.to_datetime(monthly_expenses["Month"])
-    monthly_expenses = monthly_expenses.sort_values("Month_dt")
-    monthly_expenses["Month_Label"] = monthly_expenses["Month_dt"].dt.strftime(
-        "%b %Y")
+    # Month codes sort chronologically, so the totals are already in order
+    monthly_expenses = monthly_totals.assign(
+        Month_Label=month_labels(monthly_totals["Month"]))
 
     fig = px.bar(
         monthly_expenses,
@@ -194,14 +271,10 @@ def display_monthly_chart(df: pd.DataFrame):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def display_category_chart(df: pd.DataFrame):
+def display_category_chart(summary: dict):
     """Display category breakdown pie chart."""
-    expenses_df = df[df["Amount"] < 0].copy()
-    expenses_df["Amount"] = expenses_df["Amount"].abs()
-
-    category_totals = expenses_df.groupby(
-        "Category")["Amount"].sum().reset_index()
-    category_totals = category_totals.sort_values("Amount", ascending=False)
+    category_totals = summary["category_totals"].sort_values(
+        "Amount", ascending=False)
 
     fig = px.pie(
         category_totals,
@@ -219,16 +292,12 @@ def display_category_chart(df: pd.DataFrame):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def display_category_bar_chart(df: pd.DataFrame):
+def display_category_bar_chart(summary: dict):
     """Display category breakdown as horizontal bar chart."""
-    expenses_df = df[df["Amount"] < 0].copy()
-    expenses_df["Amount"] = expenses_df["Amount"].abs()
-
-    category_totals = expenses_df.groupby(
-        "Category")["Amount"].sum().reset_index()
+    category_totals = summary["category_totals"]
     total = category_totals["Amount"].sum()
-    category_totals["Percent"] = (
-        category_totals["Amount"] / total * 100).round(1)
+    category_totals = category_totals.assign(
+        Percent=(category_totals["Amount"] / total * 100).round(1))
     category_totals["Label"] = category_totals.apply(
         lambda row: f"${row['Amount']:,.0f} ({row['Percent']}%)", axis=1
     )
@@ -250,10 +319,11 @@ def display_category_bar_chart(df: pd.DataFrame):
     st.plotly_chart(fig, use_container_width=True)
 
 
+@st.cache_data(show_spinner=False)
 def convert_df_to_excel(df: pd.DataFrame) -> bytes:
     """Convert DataFrame to Excel bytes for download."""
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
         df.to_excel(writer, index=False, sheet_name="Transactions")
     return output.getvalue()
 
@@ -267,8 +337,9 @@ uploaded_files = st.file_uploader(
 )
 
 if uploaded_files:
-    # Load and process data
-    df = load_and_process_files(uploaded_files)
+    # Load and process data (UploadedFile isn't hashable, so cache on name + contents)
+    df = load_and_process_files(
+        tuple((f.name, f.getvalue()) for f in uploaded_files))
 
     if df is not None:
         st.success(f"Loaded {len(df)} transactions")
@@ -287,8 +358,15 @@ if uploaded_files:
         available_columns = [
             col for col in display_columns if col in df.columns]
 
+        # Tran Type and Source stay free text in the editor; as categoricals
+        # they would render as selectboxes limited to the uploaded values
+        editor_df = df[available_columns].astype({
+            col: object for col in ["Tran Type", "Source"]
+            if col in available_columns
+        })
+
         edited_df = st.data_editor(
-            df[available_columns],
+            editor_df,
             column_config={
                 "Category": st.column_config.SelectboxColumn(
                     "Category",
@@ -311,31 +389,34 @@ if uploaded_files:
 
         # Use edited dataframe for all visualizations
         df = edited_df.copy()
-        df["Month"] = pd.to_datetime(
-            df["Date"], errors="coerce").dt.to_period("M").astype(str)
+        df["Month"] = to_month_codes(df["Date"])
+
+        # Expense rows and totals shared by the metrics, charts and export
+        summary = summarize_expenses(df)
 
         # Display summary metrics
         st.header("Summary")
-        display_summary_metrics(df)
+        display_summary_metrics(df, summary)
 
         # Charts section
         st.header("Visualizations")
         chart_col1, chart_col2 = st.columns(2)
 
         with chart_col1:
-            display_monthly_chart(df)
+            display_monthly_chart(summary)
 
         with chart_col2:
-            display_category_chart(df)
+            display_category_chart(summary)
 
         # Category bar chart (full width)
-        display_category_bar_chart(df)
+        display_category_bar_chart(summary)
 
         # Download section
         st.header("Export Data")
 
         # Excel download
-        excel_data = convert_df_to_excel(df)
+        excel_data = convert_df_to_excel(
+            df.assign(Month=month_labels(df["Month"], fmt="%Y-%m")))
         st.download_button(
             label="Download as Excel",
             data=excel_data,
@@ -387,53 +468,48 @@ if uploaded_files:
                 # Open the spreadsheet
                 spreadsheet = client.open_by_url(sheet_url)
 
-                # Prepare summary data
-                expenses_df = df[df["Amount"] < 0].copy()
-                income_df = df[df["Amount"] > 0].copy()
-                total_expenses = abs(expenses_df["Amount"].sum())
-                total_income = income_df["Amount"].sum()
-
-                # Prepare category breakdown (as dictionary for easy lookup)
-                expenses_df["Amount"] = expenses_df["Amount"].abs()
-                category_totals = expenses_df.groupby(
-                    "Category")["Amount"].sum().to_dict()
-
-                # Get the "finance" sheet
+                # Read the whole "finance" sheet in a single request: row 1
+                # holds the headers and the row count gives the next empty row
                 try:
-                    finance_sheet = spreadsheet.worksheet("Joint Finance")
-                except gspread.exceptions.WorksheetNotFound:
+                    response = spreadsheet.values_batch_get(
+                        ["'Joint Finance'"])
+                except gspread.exceptions.APIError as e:
+                    # An unknown sheet name is reported as an unparsable range
+                    if e.response.status_code != 400:
+                        raise
                     st.error(
                         "Sheet named 'Joint Finance' not found. Please create it first.")
                     st.stop()
 
-                # Read header row to find column positions
-                headers = finance_sheet.row_values(1)
-
-                # Build the row data based on headers
-                row_data = []
-                for header in headers:
-                    header_lower = header.lower().strip()
-                    if header_lower == "total expenses":
-                        row_data.append(round(total_expenses, 2))
-                    elif header_lower == "total income":
-                        row_data.append(round(total_income, 2))
-                    else:
-                        # Match category name
-                        matched = False
-                        for cat_name, amount in category_totals.items():
-                            if cat_name.lower() == header_lower:
-                                row_data.append(round(amount, 2))
-                                matched = True
-                                break
-                        if not matched:
-                            row_data.append(0)  # No data for this category
-
-                # Find next empty row
-                all_values = finance_sheet.get_all_values()
+                all_values = response["valueRanges"][0].get("values", [])
+                headers = all_values[0] if all_values else []
+
+                # Map lowercase header names to values; the totals take
+                # precedence over a category with the same name
+                header_values = {
+                    cat_name.lower(): amount
+                    for cat_name, amount in zip(
+                        summary["category_totals"]["Category"],
+                        summary["category_totals"]["Amount"])
+                }
+                header_values["total expenses"] = summary["total_expenses"]
+                header_values["total income"] = summary["total_income"]
+
+                # Build the row data based on headers (0 = no data for this category)
+                row_data = [
+                    round(header_values.get(header.lower().strip(), 0), 2)
+                    for header in headers
+                ]
+
+                # Write the data to the next empty row
                 next_row = len(all_values) + 1
-
-                # Write the data to the next row
-                finance_sheet.update(f"A{next_row}", [row_data])
+                spreadsheet.values_batch_update({
+                    "valueInputOption": "RAW",
+                    "data": [{
+                        "range": f"'Joint Finance'!A{next_row}",
+                        "values": [row_data],
+                    }],
+                })
 
                 st.success(
                     f"Exported to row {next_row} in 'Joint Finance' sheet!")
@@ -459,28 +535,30 @@ if uploaded_files:
             )
 
         with filter_col3:
-            months = sorted(df["Month"].unique())
+            months = sorted(df["Month"].unique().tolist())
+            labels = dict(zip(months, month_labels(months)))
             selected_months = st.multiselect(
                 "Filter by Month",
                 options=months,
                 default=None,
+                format_func=labels.get,
             )
 
-        # Apply filters
-        filtered_df = df.copy()
+        # Apply filters as a single combined mask
+        mask = np.ones(len(df), dtype=bool)
 
         if selected_categories:
-            filtered_df = filtered_df[filtered_df["Category"].isin(
-                selected_categories)]
+            mask &= df["Category"].isin(selected_categories).to_numpy()
 
         if type_filter == "Expenses":
-            filtered_df = filtered_df[filtered_df["Amount"] < 0]
+            mask &= df["Amount"].to_numpy() < 0
         elif type_filter == "Income":
-            filtered_df = filtered_df[filtered_df["Amount"] > 0]
+            mask &= df["Amount"].to_numpy() > 0
 
         if selected_months:
-            filtered_df = filtered_df[filtered_df["Month"].isin(
-                selected_months)]
+            mask &= df["Month"].isin(selected_months).to_numpy()
+
+        filtered_df = df[mask]
 
         # Display filtered results
         st.dataframe(
@@ -1,7 +1,16 @@
 """Category definitions and matching logic for transaction categorization."""
 
+import re
+from functools import lru_cache
+
+import ahocorasick
+import numpy as np
+import pandas as pd
+
 # Category keyword mappings
-# Keywords are matched case-insensitively against Details and Particulars columns
+# Keywords are matched case-insensitively against Details and Particulars columns.
+# Category order sets precedence: when keywords from several categories match,
+# the earliest category wins. Keyword order within a category does not matter.
 CATEGORIES = {
     "Transport": ["bp"],
     "Groceries": ["countdown", "pak n save", "new world", "supermarket", "woolworths", "dairy", "four square"],
@@ -18,7 +27,41 @@ CATEGORIES = {
     "Holiday": ["holiday"],
 }
 
+# Every category name, including those assigned by the type and memo rules
+_CATEGORY_LIST = tuple(CATEGORIES.keys()) + ("Income", "Mortgage", "Other")
+_CATEGORY_CODES = {category: code for code, category in enumerate(_CATEGORY_LIST)}
+
+# Lowercased (keyword, category) pairs, flattened in priority order
+_FLAT_KEYWORDS = tuple(
+    (keyword.lower(), category)
+    for category, keywords in CATEGORIES.items()
+    for keyword in keywords
+)
+
+# One alternation pattern per category, in priority order
+_CATEGORY_PATTERNS = [
+    (category, "|".join(re.escape(keyword.lower()) for keyword in keywords))
+    for category, keywords in CATEGORIES.items()
+]
+
+
+def _build_automaton() -> ahocorasick.Automaton:
+    """Build an Aho-Corasick automaton mapping each keyword to (priority, category)."""
+    automaton = ahocorasick.Automaton()
+    # A keyword's position in _FLAT_KEYWORDS orders it by category priority
+    for priority, (keyword, category) in enumerate(_FLAT_KEYWORDS):
+        # A keyword listed under several categories keeps the first one
+        if not automaton.exists(keyword):
+            automaton.add_word(keyword, (priority, category))
+    automaton.make_automaton()
+    return automaton
 
+
+# Finds every keyword occurrence in a single pass over the text
+_AUTOMATON = _build_automaton()
+
+
+@lru_cache(maxsize=4096)
 def categorize_transaction(details: str, particulars: str, transaction_type: str = "") -> str:
     """
     Categorize a transaction based on its details, particulars, and type.
@@ -31,30 +74,88 @@ def categorize_transaction(details: str, particulars: str, transaction_type: str
     Returns:
         The category name, or "Other" if no match found
     """
+    type_lower = transaction_type.lower() if transaction_type else ""
+
     # Deposits are categorized as Income
-    if transaction_type and transaction_type.lower() == "deposit":
+    if type_lower == "deposit":
         return "Income"
 
     # Loan Payments are categorized as Mortgage
-    if transaction_type and transaction_type.lower() == "loan payment":
+    if type_lower == "loan payment":
         return "Mortgage"
 
     # Joint account transfers are Income
     memo_lower = (particulars or "").lower()
-    if "joint" in memo_lower or "joint accoun" in memo_lower:
+    if "joint" in memo_lower:
         return "Income"
 
-    # Combine and lowercase for matching
-    search_text = f"{details or ''} {particulars or ''}".lower()
+    # Combine for matching, reusing the lowercased memo and skipping the
+    # concatenation when there is no memo
+    details_lower = details.lower() if details else ""
+    search_text = f"{details_lower} {memo_lower}" if memo_lower else details_lower
+
+    # The highest-priority (lowest index) category among all keyword hits wins
+    best = min((value for _, value in _AUTOMATON.iter(search_text)), default=None)
+    if best is None:
+        return "Other"
+    return best[1]
+
+
+def categorize_series(details: pd.Series, particulars: pd.Series, transaction_types: pd.Series) -> pd.Series:
+    """
+    Categorize a whole column of transactions at once.
+
+    Vectorized equivalent of categorize_transaction: each rule runs as a single
+    pandas string operation over the column instead of a Python call per row.
+
+    Args:
+        details: Details values (merchant/payee name)
+        particulars: Particulars values (additional details)
+        transaction_types: Type values (e.g., Deposit, Payment)
+
+    Returns:
+        A categorical Series of category names aligned with the index of details
+    """
+    transactions = pd.MultiIndex.from_arrays([
+        details.fillna("").astype(str),
+        particulars.fillna("").astype(str),
+        transaction_types.fillna("").astype(str),
+    ])
+
+    # Statements repeat the same merchants many times, so categorize each
+    # distinct transaction once and scatter the results back by code
+    codes, uniques = transactions.factorize()
+    unique_details = pd.Series(uniques.get_level_values(0))
+    memo_lower = pd.Series(uniques.get_level_values(1)).str.lower()
+    types_lower = pd.Series(uniques.get_level_values(2)).str.lower()
+    search_text = unique_details.str.lower() + " " + memo_lower
+
+    # Type and memo rules take precedence over keyword matches; np.select
+    # picks the first matching rule for each transaction
+    rules = [
+        (types_lower.eq("deposit"), "Income"),
+        (types_lower.eq("loan payment"), "Mortgage"),
+        (memo_lower.str.contains("joint", regex=False), "Income"),
+    ]
+    rules += [
+        (search_text.str.contains(pattern, regex=True), category)
+        for category, pattern in _CATEGORY_PATTERNS
+    ]
 
-    for category, keywords in CATEGORIES.items():
-        for keyword in keywords:
-            if keyword.lower() in search_text:
-                return category
+    # Resolve each unique transaction to a code into the category list, then
+    # scatter the codes back so no per-row strings are ever built
+    unique_codes = np.select(
+        [mask.to_numpy(dtype=bool) for mask, _ in rules],
+        [_CATEGORY_CODES[category] for _, category in rules],
+        default=_CATEGORY_CODES["Other"],
+    )
 
-    return "Other"
+    return pd.Series(
+        pd.Categorical.from_codes(unique_codes[codes], categories=_CATEGORY_LIST),
+        index=details.index,
+    )
 
 
-def get_category_list() -> list:
-    """Return a list of all available categories including 'Income' and 'Other'."""
-    return list(CATEGORIES.keys()) + ["Income", "Mortgage", "Other"]
+def get_category_list() -> tuple:
+    """Return all available categories including 'Income' and 'Other'."""
+    return _CATEGORY_LIST